@@ -3,11 +3,26 @@ SoundCloud Auto-Liker Bot
 Автоматически лайкает треки из репостов выбранных артистов и новые песни подписок
 """
 
+import argparse
+import asyncio
 import json
+import math
+import signal
+import sys
+import threading
 import time
-from datetime import datetime, timedelta
+from array import array
+from bisect import bisect_left, insort
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from heapq import merge
+from itertools import chain, groupby, islice
+from operator import attrgetter
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import List, Dict, Set
+from types import SimpleNamespace
+from typing import List, Dict, Set, Iterable, Union
+from urllib.parse import parse_qsl, urlencode, urlsplit
 import logging
 
 # Установить: pip install soundcloud-v2 selenium
@@ -31,6 +46,39 @@ except ImportError:
     print("⚠ Selenium не установлен. Для реальных лайков установите: pip install selenium")
     print("  Пока будет работать только режим dry_run")
 
+# Опционально: pip install aiohttp (асинхронная загрузка репостов, config: async_fetch)
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+# Опционально: pip install httpx[http2] (лайки через API по одному HTTP/2 соединению)
+try:
+    import httpx
+    import h2  # noqa: F401 - без h2 httpx работает только по HTTP/1.1
+    HTTPX_HTTP2_AVAILABLE = True
+except ImportError:
+    HTTPX_HTTP2_AVAILABLE = False
+
+# Опционально: pip install urllib3 (пул соединений для лайков через API)
+try:
+    import urllib3
+except ImportError:
+    urllib3 = None
+
+# Опционально: pip install pyroaring (сжатое множество обработанных ID)
+try:
+    from pyroaring import BitMap64
+except ImportError:
+    BitMap64 = None
+
+# Опционально: pip install orjson (быстрее стандартного json)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Настройка логирования
 logging.basicConfig(
     level=logging.INFO,
@@ -41,6 +89,286 @@ logging.basicConfig(
     ]
 )
 
+_API_V2_URL = 'https://api-v2.soundcloud.com'
+
+# Формат created_at в ответах SoundCloud API: 2024-10-30T12:34:56Z
+_ISO_Z_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+# Лента артиста читается страницами по _FEED_PAGE_SIZE до курсора или времени
+# отсечки; _FEED_MAX_ITEMS - предохранитель на случай ленты без created_at
+_FEED_PAGE_SIZE = 20
+_FEED_MAX_ITEMS = 500
+
+# Размер записи в processed_ids.bin: один ID как int64 LE
+_ID_RECORD_SIZE = 8
+
+# Bloom-префильтр для processed_tracks: 2^26 бит (8 МБ), один хеш на ID
+_BLOOM_BITS_LOG2 = 26
+_BLOOM_BYTES = 1 << (_BLOOM_BITS_LOG2 - 3)
+_BLOOM_HASH_MULT = 0x9E3779B97F4A7C15
+
+# Режим bloom_only_threshold: доля ложных срабатываний по умолчанию и наибольшая допустимая
+_BLOOM_ERROR_RATE = 1e-4
+_BLOOM_MAX_ERROR_RATE = 0.01
+
+# Поля трека и пользователя читаются одним вызовом attrgetter
+_TRACK_ATTRS = attrgetter('id', 'title', 'permalink_url', 'duration', 'genre',
+                          'likes_count', 'created_at', 'user')
+_USER_ATTRS = attrgetter('username', 'id')
+
+# Разбор JSON для файлов и ответов API: orjson, если установлен
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+
+def _load_json(path: Path):
+    """Прочитать JSON файл (через orjson, если установлен)"""
+    # Оба парсера принимают bytes: без TextIOWrapper и промежуточной str
+    return _json_loads(path.read_bytes())
+
+
+def _dump_json(path: Path, obj, indent: int = 4):
+    """Записать объект в JSON файл (через orjson, если установлен)"""
+    if orjson is not None:
+        # orjson поддерживает только отступ в 2 пробела и всегда пишет UTF-8;
+        # OPT_NON_STR_KEYS - как json, превращает int-ключи в строки
+        path.write_bytes(orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        return
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(obj, f, indent=indent, ensure_ascii=False)
+
+
+def _to_api_object(data):
+    """Превратить JSON ответа API в объекты с атрибутами (как у объектов soundcloud-v2)"""
+    if isinstance(data, dict):
+        return SimpleNamespace(**{key: _to_api_object(value) for key, value in data.items()})
+    if isinstance(data, list):
+        return [_to_api_object(value) for value in data]
+    return data
+
+
+@lru_cache(maxsize=8192)
+def _parse_created_at(created_at: str) -> datetime:
+    """
+    Разобрать created_at трека (результаты кешируются: треки повторяются между циклами)
+    
+    Returns:
+        Время в UTC с timezone (время без timezone считается UTC)
+    """
+    # Формат может быть: 2024-10-30T12:34:56Z
+    if created_at.endswith('Z'):
+        return datetime.fromisoformat(created_at[:-1]).replace(tzinfo=timezone.utc)
+    parsed = datetime.fromisoformat(created_at)
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def _created_at_iso(created_at) -> str:
+    """
+    created_at элемента ленты строкой для сравнения по курсору
+    
+    soundcloud-v2 отдаёт datetime с timezone, прямые запросы к API - строки
+    формата _ISO_Z_FORMAT. datetime переводится в UTC и в тот же формат.
+    
+    Returns:
+        Строка времени или '' если время неизвестно
+    """
+    if isinstance(created_at, datetime):
+        if created_at.tzinfo is not None:
+            created_at = created_at.astimezone(timezone.utc)
+        return created_at.strftime(_ISO_Z_FORMAT)
+    if isinstance(created_at, str):
+        return created_at
+    return ''
+
+
+def _bloom_hash(track_id: int) -> int:
+    """Номер бита в Bloom-фильтре (старшие биты мультипликативного хеша)"""
+    return ((track_id * _BLOOM_HASH_MULT) & 0xFFFFFFFFFFFFFFFF) >> (64 - _BLOOM_BITS_LOG2)
+
+
+def _bloom_params(capacity: int, error_rate: float) -> tuple:
+    """Число бит и хешей Bloom-фильтра на capacity ID с долей ложных срабатываний error_rate"""
+    capacity = max(1, capacity)
+    num_bits = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+    num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+    return num_bits, num_hashes
+
+
+def _mix64(x: int) -> int:
+    """Перемешивание 64-битного числа (финализатор splitmix64)"""
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+    return x ^ (x >> 31)
+
+
+def _read_id_records(raw: bytes) -> array:
+    """Разобрать записи int64 LE из журнала ID"""
+    records = array('q')
+    records.frombytes(raw)
+    if sys.byteorder == 'big':
+        records.byteswap()
+    return records
+
+
+def _http_status(error: Exception):
+    """HTTP статус из исключения клиента SoundCloud или aiohttp (None если это не ошибка HTTP)"""
+    # HTTPError (curl_cffi/requests): response.status_code, aiohttp.ClientResponseError: status
+    return getattr(getattr(error, 'response', None), 'status_code', None) or getattr(error, 'status', None)
+
+
+def _retry_after_delay(headers, attempt: int) -> float:
+    """Пауза перед повтором после 429: Retry-After или экспоненциальная"""
+    retry_after = (headers or {}).get('Retry-After', '')
+    return float(retry_after) if retry_after.isdigit() else float(2 ** attempt)
+
+
+class _RateLimiter:
+    """Потокобезопасный ограничитель частоты запросов к API"""
+    
+    def __init__(self, requests_per_second: float):
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self._next_slot = 0.0
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+    
+    def _reserve(self) -> float:
+        """Занять следующий слот, вернуть сколько до него ждать"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        return slot - now
+    
+    def _paused(self) -> bool:
+        """Идёт ли пауза после 429 (слоты, занятые до неё, её не учитывают)"""
+        return time.monotonic() < self._paused_until
+    
+    def acquire(self):
+        """Дождаться своей очереди на запрос"""
+        while True:
+            delay = self._reserve()
+            if delay > 0:
+                time.sleep(delay)
+            # Пока ждали, пришёл 429 - занимаем новый слот уже после паузы
+            if not self._paused():
+                return
+    
+    async def acquire_async(self):
+        """То же что acquire, но не блокирует цикл событий asyncio"""
+        while True:
+            delay = self._reserve()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if not self._paused():
+                return
+    
+    def pause(self, delay: float):
+        """Приостановить все запросы через этот ограничитель (ответ 429 от API)"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            self._next_slot = max(self._next_slot, self._paused_until)
+
+
+class _SortedIdSet:
+    """
+    Компактное множество ID: отсортированный array('q') + бинарный поиск
+    
+    8 байт на ID вместо ~200 у set, проверка вхождения за O(log N).
+    Новые ID добавляются пачками через update().
+    """
+    
+    # До стольких новых ID вставляем на место, больше - сливаем серии
+    _INSORT_MAX = 64
+    
+    def __init__(self, track_ids: Iterable[int] = ()):
+        # Повторы убираем уже по отсортированной серии, без промежуточного set
+        self._ids = array('q', (track_id for track_id, _ in groupby(sorted(track_ids))))
+    
+    def __contains__(self, track_id) -> bool:
+        ids = self._ids
+        i = bisect_left(ids, track_id)
+        return i < len(ids) and ids[i] == track_id
+    
+    def __len__(self) -> int:
+        return len(self._ids)
+    
+    def __iter__(self):
+        return iter(self._ids)
+    
+    def add(self, track_id: int):
+        self.update((track_id,))
+    
+    def update(self, track_ids: Iterable[int]):
+        """
+        Добавить пачку ID, уже известные пропускаются
+        
+        Небольшая пачка вставляется на место через insort, большая -
+        одним слиянием двух упорядоченных серий без общей пересортировки.
+        """
+        new_ids = [track_id for track_id, _ in groupby(sorted(track_ids)) if track_id not in self]
+        if len(new_ids) <= self._INSORT_MAX:
+            ids = self._ids
+            for track_id in new_ids:
+                insort(ids, track_id)
+        else:
+            self._ids = array('q', merge(self._ids, new_ids))
+
+
+class _BloomIdSet:
+    """
+    Множество ID, хранящееся только в виде Bloom-фильтра
+    
+    Размер фильтра и число хешей k считаются по ёмкости и допустимой доле
+    ложных срабатываний, k позиций бит получаются двойным хешированием.
+    Ложное срабатывание - новый трек считается обработанным и пропускается,
+    но уже обработанный трек никогда не будет лайкнут повторно. Сверх
+    ёмкости доля ложных срабатываний растёт, поэтому тогда фильтр
+    перестраивается по processed_ids.bin с большей ёмкостью.
+    """
+    
+    def __init__(self, capacity: int, error_rate: float, count: int = 0, bits: bytearray = None):
+        self.capacity = capacity
+        self.num_bits, self.num_hashes = _bloom_params(capacity, error_rate)
+        self.bits = bits if bits is not None else bytearray((self.num_bits + 7) // 8)
+        self._count = count
+    
+    def __contains__(self, track_id) -> bool:
+        bits = self.bits
+        num_bits = self.num_bits
+        h = _mix64(track_id & 0xFFFFFFFFFFFFFFFF)
+        # Двойное хеширование: позиции h1 + i * h2 (h2 нечётный)
+        h1, h2 = h >> 32, (h & 0xFFFFFFFF) | 1
+        for i in range(self.num_hashes):
+            position = (h1 + i * h2) % num_bits
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    def add(self, track_id: int):
+        self.update((track_id,))
+    
+    def update(self, track_ids: Iterable[int]):
+        bits = self.bits
+        num_bits = self.num_bits
+        hashes = range(self.num_hashes)
+        for track_id in track_ids:
+            h = _mix64(track_id & 0xFFFFFFFFFFFFFFFF)
+            h1, h2 = h >> 32, (h & 0xFFFFFFFF) | 1
+            for i in hashes:
+                position = (h1 + i * h2) % num_bits
+                bits[position >> 3] |= 1 << (position & 7)
+            self._count += 1
+    
+    def expected_error_rate(self) -> float:
+        """Ожидаемая доля ложных срабатываний при текущем числе ID"""
+        k = self.num_hashes
+        return (1 - math.exp(-k * self._count / self.num_bits)) ** k
+
+
 class SoundCloudAutoLiker:
     def __init__(self, config_path: str = 'config.json'):
         """
@@ -65,13 +393,55 @@ class SoundCloudAutoLiker:
             logging.error(f"Ошибка инициализации клиента: {e}")
             self.client = SoundCloud()
         
-        self.processed_tracks_file = 'processed_tracks.json'
+        self._rate_limiter = _RateLimiter(float(self.config.get('api_requests_per_second', 4)))
+        self._like_limiter = _RateLimiter(float(self.config.get('likes_per_second', 1)))
+        self._like_pool = None  # urllib3.PoolManager для лайков через API (создаётся при первом лайке)
+        # Кеш ответов API для aiohttp: (путь, параметры) -> (время, ETag, Last-Modified, JSON)
+        self._http_cache: Dict[tuple, tuple] = {}
+        
+        # Файлы состояния лежат рядом с конфигурацией (или в state_dir):
+        # у нескольких экземпляров со своими --config они не пересекаются
+        state_dir = Path(self.config.get('state_dir') or Path(config_path).parent)
+        state_dir.mkdir(parents=True, exist_ok=True)
+        
+        # Кеш username -> ID пользователя (ID не меняются, resolve не нужен каждый цикл)
+        self.user_ids_file = str(state_dir / 'artist_ids.json')
+        self._cache_lock = threading.Lock()
+        self._user_ids_dirty = False
+        self._user_ids = self.load_user_ids()
+        
+        # Время самого нового обработанного элемента у каждого артиста:
+        # в следующем цикле чтение ленты артиста останавливается на нём
+        self.artist_cursors_file = str(state_dir / 'artist_cursors.json')
+        self._artist_cursors = self.load_artist_cursors()
+        # Прочитанное за цикл: ключ ленты -> [(время, ID трека)] от новых к старым
+        self._pending_cursors: Dict[str, List[tuple]] = {}
+        
+        # ID хранятся в бинарном файле записями фиксированной длины (int64 LE),
+        # новые ID дописываются в конец файла без перезаписи всей истории.
+        # Каждая запись самодостаточна, поэтому дозапись из двух процессов
+        # сразу не портит журнал (в худшем случае появятся повторы)
+        self.processed_tracks_file = str(state_dir / 'processed_ids.bin')
+        self.legacy_processed_tracks_file = str(state_dir / 'processed_tracks.json')
+        # Снимок Bloom-фильтра (режим bloom_only_threshold): при запуске
+        # дочитывается только хвост processed_ids.bin после снимка
+        self.bloom_snapshot_file = str(state_dir / 'processed_tracks.bloom')
+        self._pending_new: List[int] = []
+        # Bloom-фильтр создаётся только для _SortedIdSet и режима bloom_only_threshold:
+        # set и BitMap64 проверяют вхождение быстрее, а 8 МБ лишь заняли бы память
+        self._bloom = None
         self.processed_tracks = self.load_processed_tracks()
+        if isinstance(self.processed_tracks, _SortedIdSet):
+            self._bloom_update(self.processed_tracks)
         
         # Selenium драйвер (инициализируется при первом использовании)
         self.driver = None
         self.selenium_logged_in = False
         
+        # Счётчики для /metrics (config: status_port)
+        self._cycles_done = 0
+        self._last_cycle_at = 0.0
+        
         logging.info("SoundCloud Auto-Liker инициализирован")
     
     def load_config(self) -> Dict:
@@ -87,6 +457,20 @@ class SoundCloudAutoLiker:
             'check_interval_minutes': 60,
             'hours_lookback': 72,  # Увеличено до 3 дней для первого запуска
             'dry_run': True,
+            'max_workers': 6,  # Потоков для параллельной загрузки репостов
+            'api_requests_per_second': 4,  # Общий лимит запросов к API
+            'followings_per_artist': False,  # Опрашивать каждую подписку отдельно (параллельно) вместо стрима
+            'followings_limit': 200,  # Сколько подписок опрашивать в режиме followings_per_artist
+            'async_fetch': False,  # Загружать репосты через aiohttp (нужен pip install aiohttp)
+            'api_cache_ttl_seconds': 300,  # Сколько секунд ответ API (async_fetch) считается свежим
+            'state_dir': '',  # Папка для файлов состояния ('' = папка с файлом конфигурации)
+            'status_port': 0,  # Порт для /metrics в режиме цикла (0 = выключено, нужен aiohttp)
+            'low_memory_threshold': 100000,  # С этого числа ID история хранится в массиве, а не в set
+            'bloom_only_threshold': 0,  # С этого числа ID история хранится только в Bloom-фильтре (0 = никогда)
+            'bloom_error_rate': 0.0001,  # Доля новых треков, которые Bloom-фильтр ошибочно сочтёт обработанными
+            'api_likes': False,  # Лайкать через API вместо Selenium (нужны auth_token и pip install aiohttp)
+            'like_concurrency': 8,  # Одновременных запросов лайков через API
+            'likes_per_second': 1,  # Лимит лайков в секунду (Selenium и API)
             
             # Настройки Selenium
             'selenium': {
@@ -115,36 +499,427 @@ class SoundCloudAutoLiker:
         config_file = Path(self.config_path)
         
         if config_file.exists():
-            with open(config_file, 'r', encoding='utf-8') as f:
-                loaded_config = json.load(f)
-                default_config.update(loaded_config)
-                logging.info(f"Конфигурация загружена из {self.config_path}")
+            loaded_config = _load_json(config_file)
+            default_config.update(loaded_config)
+            logging.info(f"Конфигурация загружена из {self.config_path}")
         else:
-            with open(config_file, 'w', encoding='utf-8') as f:
-                json.dump(default_config, f, indent=4, ensure_ascii=False)
+            _dump_json(config_file, default_config)
             logging.warning(f"Создан новый файл конфигурации: {self.config_path}")
             logging.warning("Пожалуйста, отредактируйте config.json перед запуском")
         
+        self._compile_filters(default_config['filters'])
         return default_config
     
-    def load_processed_tracks(self) -> Set[int]:
+    def _compile_filters(self, filters: Dict):
+        """Подготовить значения фильтров один раз, а не для каждого трека"""
+        # 0 = без ограничения
+        min_duration_ms = max(0, filters.get('min_duration_seconds', 0)) * 1000
+        max_duration_ms = max(0, filters.get('max_duration_seconds', 0)) * 1000
+        genre_set = frozenset(g.lower() for g in filters.get('genres', [])) or None
+        
+        # Значения фильтров - аргументы по умолчанию замыкания: внутри это
+        # локальные переменные, без обращений к self и config для каждого трека
+        def track_filter(track: Dict, min_dur_ms=min_duration_ms,
+                         max_dur_ms=max_duration_ms or float('inf'),
+                         genres=genre_set, min_likes=filters.get('min_likes', 0)) -> bool:
+            duration_ms = track.get('duration') or 0
+            if duration_ms < min_dur_ms or duration_ms > max_dur_ms:
+                return False
+            if genres is not None and (track.get('genre') or '').lower() not in genres:
+                return False
+            return (track.get('likes_count') or 0) >= min_likes
+        
+        self._filter_fn = track_filter
+    
+    def load_user_ids(self) -> Dict[str, int]:
+        """Загрузка кеша ID пользователей"""
+        user_ids_file = Path(self.user_ids_file)
+        
+        if user_ids_file.exists():
+            try:
+                return dict(_load_json(user_ids_file))
+            except Exception as e:
+                logging.warning(f"Не удалось прочитать {self.user_ids_file}: {e}")
+        
+        return {}
+    
+    def save_user_ids(self):
+        """Сохранение кеша ID пользователей (только если он изменился)"""
+        with self._cache_lock:
+            if not self._user_ids_dirty:
+                return
+            _dump_json(Path(self.user_ids_file), self._user_ids)
+            self._user_ids_dirty = False
+    
+    def load_artist_cursors(self) -> Dict[str, str]:
+        """Загрузка курсоров лент артистов"""
+        cursors_file = Path(self.artist_cursors_file)
+        
+        if cursors_file.exists():
+            try:
+                return dict(_load_json(cursors_file))
+            except Exception as e:
+                logging.warning(f"Не удалось прочитать {self.artist_cursors_file}: {e}")
+        
+        return {}
+    
+    def save_artist_cursors(self, attempted_ids: Iterable[int] = ()):
+        """
+        Сдвинуть курсоры по лентам, прочитанным за цикл, и сохранить их
+        
+        Курсор доходит только до самого старого трека, который в этом цикле
+        был найден, но так и не отмечен обработанным (лайк не удался):
+        в следующем цикле лента снова читается начиная с него.
+        
+        Args:
+            attempted_ids: ID треков, переданных в process_tracks в этом цикле
+        """
+        with self._cache_lock:
+            if not self._pending_cursors:
+                return
+            pending, self._pending_cursors = self._pending_cursors, {}
+        
+        failed_ids = {track_id for track_id in attempted_ids if not self.is_processed(track_id)}
+        
+        with self._cache_lock:
+            changed = False
+            for key, seen in pending.items():
+                cursor = old_cursor = self._artist_cursors.get(key, '')
+                # От старых элементов к новым, до первого необработанного
+                for created_at, track_id in reversed(seen):
+                    if track_id in failed_ids:
+                        break
+                    cursor = max(cursor, created_at)
+                if cursor != old_cursor:
+                    self._artist_cursors[key] = cursor
+                    changed = True
+            
+            if changed:
+                _dump_json(Path(self.artist_cursors_file), self._artist_cursors)
+    
+    def _feed_stop_at(self, artist_id: Union[int, str], cutoff_iso: str) -> str:
+        """Время, на котором прекращается чтение ленты: курсор или отсечка, что новее"""
+        return max(self._artist_cursors.get(str(artist_id), ''), cutoff_iso or '')
+    
+    def _take_unseen(self, items: Iterable, artist_id: Union[int, str], cutoff_iso: str = None) -> List:
+        """
+        Взять элементы ленты артиста новее курсора и времени отсечки
+        
+        API отдаёт ленту от новых элементов к старым, поэтому чтение
+        (и подгрузка следующих страниц) прекращается на первом уже виденном
+        или более старом, чем отсечка: из него новый трек уже не получится.
+        Курсор сдвигается позже, в save_artist_cursors.
+        
+        Args:
+            items: Элементы ленты (репосты или треки)
+            artist_id: ID артиста (или ключ ленты)
+            cutoff_iso: Время отсечки в формате _ISO_Z_FORMAT
+            
+        Returns:
+            Список новых элементов
+        """
+        key = str(artist_id)
+        stop_at = self._feed_stop_at(key, cutoff_iso)
+        taken = []
+        seen = []
+        
+        for item in items:
+            created_at = _created_at_iso(getattr(item, 'created_at', ''))
+            if created_at and created_at <= stop_at:
+                break
+            taken.append(item)
+            if created_at:
+                track = getattr(item, 'track', None) or item
+                seen.append((created_at, getattr(track, 'id', None)))
+        
+        if seen:
+            with self._cache_lock:
+                self._pending_cursors[key] = seen
+        
+        return taken
+    
+    def _paged_feed(self, items: Iterable) -> Iterable:
+        """
+        Ленту soundcloud-v2 (генератор с подгрузкой страниц) читать через лимитер
+        
+        Первую страницу вызывающий код уже оплатил acquire, перед каждой
+        следующей ждём лимитер. Всего не больше _FEED_MAX_ITEMS элементов.
+        """
+        acquire = self._rate_limiter.acquire
+        items = iter(items)
+        for i in range(_FEED_MAX_ITEMS):
+            if i and i % _FEED_PAGE_SIZE == 0:
+                acquire()
+            item = next(items, None)
+            if item is None:
+                return
+            yield item
+    
+    def _resolve_user_id(self, username: str) -> int:
+        """
+        Получить ID пользователя по username (с кешированием)
+        
+        Args:
+            username: Username пользователя SoundCloud
+            
+        Returns:
+            ID пользователя
+        """
+        user_id = self._user_ids.get(username)
+        if user_id is not None:
+            return user_id
+        
+        self._rate_limiter.acquire()
+        user = self.client.resolve(f'https://soundcloud.com/{username}')
+        with self._cache_lock:
+            self._user_ids[username] = user.id
+            self._user_ids_dirty = True
+        return user.id
+    
+    def _forget_user_id(self, username: str, error: Exception):
+        """Сбросить ID из кеша, если API ответил 404 (пользователь удалён или переименован)"""
+        if _http_status(error) != 404:
+            return
+        with self._cache_lock:
+            if self._user_ids.pop(username, None) is not None:
+                self._user_ids_dirty = True
+    
+    def load_processed_tracks(self) -> Union[Set[int], _SortedIdSet, _BloomIdSet, 'BitMap64']:
         """Загрузка ID уже обработанных треков"""
         tracks_file = Path(self.processed_tracks_file)
         
         if tracks_file.exists():
-            with open(tracks_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return set(data.get('track_ids', []))
+            # Обрезаем недописанную запись (если процесс упал во время записи)
+            file_size = tracks_file.stat().st_size
+            valid_size = file_size - file_size % _ID_RECORD_SIZE
+            if valid_size != file_size:
+                with open(tracks_file, 'r+b') as f:
+                    f.truncate(valid_size)
+            
+            # Со снимком Bloom-фильтра читаем только ID, дописанные после него
+            snapshot = self._load_bloom_snapshot(valid_size)
+            offset, processed = snapshot or (0, None)
+            with open(tracks_file, 'rb') as f:
+                f.seek(offset)
+                track_ids = _read_id_records(f.read(valid_size - offset)).tolist()
+            
+            if processed is None:
+                if len(track_ids) > self._bloom_only_threshold():
+                    return self._build_bloom_id_set(track_ids)
+                processed = self._make_id_set(track_ids)
+                # Повторы в журнале (например, от двух одновременно запущенных ботов)
+                if len(track_ids) > 2 * len(processed):
+                    self._compact_processed_tracks(track_ids)
+                return processed
+            
+            if not track_ids:
+                return processed
+            processed.update(track_ids)
+            if len(processed) > processed.capacity:
+                return self._build_bloom_id_set(self._read_processed_ids())
+            self._save_bloom_snapshot(processed)
+            return processed
+        
+        # Истории нет - старый снимок фильтра к ней больше не относится
+        Path(self.bloom_snapshot_file).unlink(missing_ok=True)
+        
+        # Миграция со старого формата processed_tracks.json
+        legacy_file = Path(self.legacy_processed_tracks_file)
+        if legacy_file.exists():
+            data = _load_json(legacy_file)
+            track_ids = set(data.get('track_ids', []))
+            if track_ids:
+                self._append_processed_ids(sorted(track_ids))
+                logging.info(f"ID треков перенесены из {legacy_file} в {tracks_file}")
+            return self._make_id_set(track_ids)
+        
+        return self._make_id_set(())
+    
+    def _make_id_set(self, track_ids: Iterable[int]):
+        """
+        Создать контейнер для processed_tracks
+        
+        Roaring bitmap (если установлен pyroaring) хранит ID в сжатом виде
+        с проверкой вхождения за O(1). Без него - set, а для большой
+        истории - _SortedIdSet. На диске формат один и тот же.
+        """
+        if BitMap64 is not None:
+            return BitMap64(track_ids)
+        if not isinstance(track_ids, (list, set)):
+            track_ids = list(track_ids)
+        if len(track_ids) > self._low_memory_threshold():
+            return _SortedIdSet(track_ids)
+        return set(track_ids)
+    
+    def _bloom_only_threshold(self) -> int:
+        """Число ID, после которого история хранится только в Bloom-фильтре (0 = никогда)"""
+        return int(self.config.get('bloom_only_threshold', 0)) or sys.maxsize
+    
+    def _bloom_error_rate(self) -> float:
+        """Доля ложных срабатываний для режима bloom_only_threshold (config: bloom_error_rate)"""
+        error_rate = float(self.config.get('bloom_error_rate', _BLOOM_ERROR_RATE))
+        if not 0 < error_rate <= _BLOOM_MAX_ERROR_RATE:
+            logging.warning("bloom_error_rate=%s вне (0, %s], используется %s",
+                            error_rate, _BLOOM_MAX_ERROR_RATE, _BLOOM_ERROR_RATE)
+            return _BLOOM_ERROR_RATE
+        return error_rate
+    
+    def _read_processed_ids(self) -> List[int]:
+        """Прочитать все ID из processed_ids.bin"""
+        raw = Path(self.processed_tracks_file).read_bytes()
+        return _read_id_records(raw[:len(raw) - len(raw) % _ID_RECORD_SIZE]).tolist()
+    
+    def _build_bloom_id_set(self, track_ids: List[int]) -> _BloomIdSet:
+        """
+        Построить Bloom-фильтр по всей истории и сохранить его снимок
         
-        return set()
+        Ёмкость - вдвое больше текущего числа ID, так что перестраивать
+        фильтр (заново читая processed_ids.bin) приходится редко.
+        """
+        error_rate = self._bloom_error_rate()
+        processed = _BloomIdSet(2 * len(track_ids), error_rate)
+        processed.update(track_ids)
+        self._save_bloom_snapshot(processed)
+        logging.info("История обработанных треков хранится в Bloom-фильтре: %d ID, ёмкость %d, "
+                     "ложных срабатываний ~%.4f%% (не больше %.4f%% при заполнении)",
+                     len(processed), processed.capacity, 100 * processed.expected_error_rate(),
+                     100 * error_rate)
+        return processed
+    
+    def _load_bloom_snapshot(self, file_size: int):
+        """
+        Загрузить снимок Bloom-фильтра
+        
+        Args:
+            file_size: Текущий размер processed_ids.bin
+            
+        Returns:
+            (размер processed_ids.bin на момент снимка, _BloomIdSet)
+            или None, если снимка нет, он устарел, режим выключен
+            или фильтр был рассчитан на другую долю ложных срабатываний
+        """
+        snapshot_file = Path(self.bloom_snapshot_file)
+        if self._bloom_only_threshold() == sys.maxsize or not snapshot_file.exists():
+            return None
+        
+        raw = snapshot_file.read_bytes()
+        header = array('q')
+        header_size = 3 * header.itemsize
+        if len(raw) < header_size:
+            return None
+        header.frombytes(raw[:header_size])
+        if sys.byteorder == 'big':
+            header.byteswap()
+        offset, count, capacity = header
+        
+        error_rate = self._bloom_error_rate()
+        num_bits, _ = _bloom_params(capacity, error_rate)
+        if offset > file_size or len(raw) != header_size + (num_bits + 7) // 8:
+            return None
+        return offset, _BloomIdSet(capacity, error_rate, count, bytearray(raw[header_size:]))
+    
+    def _save_bloom_snapshot(self, processed: _BloomIdSet):
+        """Сохранить Bloom-фильтр вместе с позицией в processed_ids.bin"""
+        header = array('q', [Path(self.processed_tracks_file).stat().st_size, len(processed), processed.capacity])
+        if sys.byteorder == 'big':
+            header.byteswap()
+        Path(self.bloom_snapshot_file).write_bytes(header.tobytes() + processed.bits)
+    
+    def _low_memory_threshold(self) -> int:
+        """Число ID, после которого processed_tracks хранится в _SortedIdSet (0 = никогда)"""
+        return int(self.config.get('low_memory_threshold', 0)) or sys.maxsize
+    
+    def _bloom_update(self, track_ids: Iterable[int]):
+        """Добавить ID в Bloom-фильтр (фильтр создаётся при первом вызове)"""
+        if self._bloom is None:
+            self._bloom = bytearray(_BLOOM_BYTES)
+        bloom = self._bloom
+        for track_id in track_ids:
+            h = _bloom_hash(track_id)
+            bloom[h >> 3] |= 1 << (h & 7)
+    
+    def is_processed(self, track_id: int) -> bool:
+        """
+        Проверить что трек уже обработан
+        
+        Перед _SortedIdSet Bloom-фильтр отсекает большинство новых ID без
+        бинарного поиска. set и BitMap64 проверяют вхождение быстрее, чем
+        считается хеш, поэтому к ним обращаемся сразу.
+        """
+        processed = self.processed_tracks
+        if isinstance(processed, _SortedIdSet):
+            h = _bloom_hash(track_id)
+            if not self._bloom[h >> 3] & (1 << (h & 7)):
+                return False
+        return track_id in processed
+    
+    def mark_processed(self, track_id: int):
+        """
+        Отметить трек как обработанный
+        
+        ID накапливаются и попадают в processed_tracks одной пачкой
+        при вызове save_processed_tracks (раз за цикл).
+        """
+        self._pending_new.append(track_id)
+    
+    def _append_processed_ids(self, new_ids: Iterable[int], tracks_file: Path = None):
+        """Дописать новые ID в конец файла, по записи int64 LE на ID"""
+        records = array('q', new_ids)
+        if sys.byteorder == 'big':
+            records.byteswap()
+        
+        # Одна запись в режиме O_APPEND: данные другого процесса не перемешаются
+        with open(tracks_file or self.processed_tracks_file, 'ab') as f:
+            f.write(records.tobytes())
+    
+    def _compact_processed_tracks(self, track_ids: List[int]):
+        """Переписать processed_ids.bin без повторов, в порядке возрастания ID"""
+        tracks_file = Path(self.processed_tracks_file)
+        tmp_file = tracks_file.with_name(tracks_file.name + '.tmp')
+        tmp_file.unlink(missing_ok=True)
+        
+        # Уникальность через сортировку: повторы соседние и убираются одним
+        # проходом, без промежуточного set на всю историю
+        track_ids.sort()
+        unique_ids = array('q', (track_id for track_id, _ in groupby(track_ids)))
+        
+        self._append_processed_ids(unique_ids, tmp_file)
+        tmp_file.replace(tracks_file)
+        
+        # Позиция в снимке Bloom-фильтра относилась к старому файлу
+        Path(self.bloom_snapshot_file).unlink(missing_ok=True)
+        logging.info(f"Журнал {tracks_file} сжат до {len(unique_ids)} ID")
     
     def save_processed_tracks(self):
         """Сохранение ID обработанных треков"""
-        with open(self.processed_tracks_file, 'w', encoding='utf-8') as f:
-            json.dump({
-                'track_ids': list(self.processed_tracks),
-                'last_updated': datetime.now().isoformat()
-            }, f, indent=4)
+        if not self._pending_new:
+            return
+        
+        processed = self.processed_tracks
+        # После сортировки повторы соседние и убираются одним проходом
+        new_ids = [track_id for track_id, _ in groupby(sorted(self._pending_new)) if track_id not in processed]
+        self._pending_new.clear()
+        if not new_ids:
+            return
+        
+        processed.update(new_ids)
+        if isinstance(processed, _SortedIdSet):
+            self._bloom_update(new_ids)
+        self._append_processed_ids(new_ids)
+        
+        if isinstance(processed, _BloomIdSet):
+            # Сверх ёмкости фильтр перестраивается, иначе растёт доля ложных срабатываний
+            if len(processed) > processed.capacity:
+                self.processed_tracks = self._build_bloom_id_set(self._read_processed_ids())
+            return
+        if len(processed) > self._bloom_only_threshold():
+            # Множество и префильтр больше не нужны: проверка идёт по самому Bloom-фильтру
+            self.processed_tracks = self._build_bloom_id_set(list(processed))
+            self._bloom = None
+        elif isinstance(processed, set) and len(processed) > self._low_memory_threshold():
+            self.processed_tracks = _SortedIdSet(processed)
+            self._bloom_update(processed)
+            logging.info(f"История обработанных треков переведена в компактный массив ({len(processed)} ID)")
     
     def get_track_info(self, track_obj) -> Dict:
         """
@@ -157,29 +932,40 @@ class SoundCloudAutoLiker:
             Словарь с данными трека
         """
         try:
-            # Попробуем получить атрибуты объекта
-            track_dict = {}
-            
-            # Основные поля
-            track_dict['id'] = getattr(track_obj, 'id', None)
-            track_dict['title'] = getattr(track_obj, 'title', 'Unknown')
-            track_dict['permalink_url'] = getattr(track_obj, 'permalink_url', '')
-            track_dict['duration'] = getattr(track_obj, 'duration', 0)
-            track_dict['genre'] = getattr(track_obj, 'genre', '')
-            track_dict['likes_count'] = getattr(track_obj, 'likes_count', 0)
-            track_dict['created_at'] = getattr(track_obj, 'created_at', '')
+            # Быстрый путь: у объектов API есть все поля
+            try:
+                (track_id, title, permalink_url, duration, genre,
+                 likes_count, created_at, user) = _TRACK_ATTRS(track_obj)
+            except AttributeError:
+                track_id = getattr(track_obj, 'id', None)
+                title = getattr(track_obj, 'title', 'Unknown')
+                permalink_url = getattr(track_obj, 'permalink_url', '')
+                duration = getattr(track_obj, 'duration', 0)
+                genre = getattr(track_obj, 'genre', '')
+                likes_count = getattr(track_obj, 'likes_count', 0)
+                created_at = getattr(track_obj, 'created_at', '')
+                user = getattr(track_obj, 'user', None)
             
             # Информация о пользователе
-            user = getattr(track_obj, 'user', None)
             if user:
-                track_dict['user'] = {
-                    'username': getattr(user, 'username', 'Unknown'),
-                    'id': getattr(user, 'id', None)
-                }
+                try:
+                    username, user_id = _USER_ATTRS(user)
+                except AttributeError:
+                    username = getattr(user, 'username', 'Unknown')
+                    user_id = getattr(user, 'id', None)
             else:
-                track_dict['user'] = {'username': 'Unknown', 'id': None}
+                username, user_id = 'Unknown', None
             
-            return track_dict
+            return {
+                'id': track_id,
+                'title': title,
+                'permalink_url': permalink_url,
+                'duration': duration,
+                'genre': genre,
+                'likes_count': likes_count,
+                'created_at': created_at,
+                'user': {'username': username, 'id': user_id}
+            }
         except Exception as e:
             logging.error(f"Ошибка при извлечении данных трека: {e}")
             return {}
@@ -204,159 +990,537 @@ class SoundCloudAutoLiker:
                 logging.error("Не указан your_username в config.json")
                 return []
             
-            # Получаем информацию о пользователе
-            user = self.client.resolve(f'https://soundcloud.com/{username}')
+            # Получаем ID пользователя
+            user_id = self._resolve_user_id(username)
+            self.save_user_ids()
+            
+            hours_back = int(self.config['hours_lookback'])
+            cutoff_time = datetime.now(timezone.utc) - timedelta(hours=hours_back)
+            logging.info(f"Ищем треки новее чем: {cutoff_time.strftime('%Y-%m-%d %H:%M:%S')} UTC ({hours_back} часов назад)")
+            cutoff_iso = cutoff_time.strftime(_ISO_Z_FORMAT)
+            
+            if self.config.get('followings_per_artist'):
+                return self._fetch_followings_tracks(user_id, cutoff_time, cutoff_iso)
             
             # Получаем треки из стрима пользователя (это включает подписки)
             logging.info("Получение стрима (может занять время)...")
-            stream_items = self.client.get_user_stream(user.id, limit=50)
+            # limit - только размер страницы, без islice генератор читал бы весь стрим
+            stream_items = islice(self.client.get_user_stream(user_id, limit=50), 50)
             
-            hours_back = int(self.config['hours_lookback'])
-            cutoff_time = datetime.now() - timedelta(hours=hours_back)
-            logging.info(f"Ищем треки новее чем: {cutoff_time.strftime('%Y-%m-%d %H:%M:%S')} ({hours_back} часов назад)")
+            # В стриме могут быть разные типы объектов
+            tracks = [getattr(item, 'track', None) or item for item in stream_items]
+            candidates = self._prefilter_tracks(tracks, cutoff_time, cutoff_iso)
+            
+            # Локальные ссылки вместо поиска атрибутов self на каждой итерации
+            check_processed = self.is_processed
+            check_recent = self.is_created_recent
+            get_info = self.get_track_info
+            append_track = new_tracks.append
+            
+            items = zip(tracks, candidates)
             
-            total_items = 0
-            for item in stream_items:
-                total_items += 1
+            # Первые 5 элементов разбираем полностью и логируем для отладки
+            for total_items, (track, _) in zip(range(1, 6), items):
                 try:
-                    # В стриме могут быть разные типы объектов
-                    track = getattr(item, 'track', None) or item
-                    
-                    if not hasattr(track, 'id'):
-                        logging.debug(f"Элемент {total_items}: нет ID")
-                        continue
-                    
-                    track_dict = self.get_track_info(track)
+                    track_dict = get_info(track)
                     
                     if not track_dict or not track_dict.get('id'):
-                        logging.debug(f"Элемент {total_items}: не удалось получить данные трека")
+                        logging.debug("Элемент %d: не удалось получить данные трека", total_items)
                         continue
                     
-                    # Логируем каждый трек для первых 5 элементов
                     created_at = track_dict.get('created_at', 'unknown')
-                    is_recent = self.is_track_recent(track_dict, cutoff_time)
-                    is_processed = track_dict['id'] in self.processed_tracks
+                    is_recent = check_recent(track_dict['created_at'], cutoff_time, cutoff_iso)
+                    is_processed = check_processed(track_dict['id'])
                     
-                    if total_items <= 5:
-                        logging.info(f"  → Трек: {track_dict['user']['username']} - {track_dict['title']}")
-                        logging.info(f"     Created: {created_at} | Recent: {is_recent} | Processed: {is_processed}")
+                    logging.info("  → Трек: %s - %s", track_dict['user']['username'], track_dict['title'])
+                    logging.info("     Created: %s | Recent: %s | Processed: %s", created_at, is_recent, is_processed)
                     
                     # Проверяем что трек новый и еще не обработан
-                    if track_dict['id'] not in self.processed_tracks and is_recent:
-                        new_tracks.append(track_dict)
-                        logging.info(f"✓ Найден новый трек: {track_dict['user']['username']} - {track_dict['title']}")
+                    if not is_processed and is_recent:
+                        append_track(track_dict)
+                        logging.info("✓ Найден новый трек: %s - %s", track_dict['user']['username'], track_dict['title'])
+                
+                except Exception as e:
+                    logging.error("Ошибка при обработке элемента стрима #%d: %s", total_items, e)
+            
+            # Остальные: уже обработанные и старые треки отсечены предфильтром,
+            # словарь строим только для новых
+            for total_items, (track, is_candidate) in enumerate(items, 6):
+                if not is_candidate:
+                    continue
+                try:
+                    track_dict = get_info(track)
+                    if track_dict:
+                        append_track(track_dict)
+                        logging.info("✓ Найден новый трек: %s - %s", track_dict['user']['username'], track_dict['title'])
                 
                 except Exception as e:
-                    logging.error(f"Ошибка при обработке элемента стрима #{total_items}: {e}")
+                    logging.error("Ошибка при обработке элемента стрима #%d: %s", total_items, e)
+            
+            total_items = len(tracks)
+            logging.info(f"Обработано элементов стрима: {total_items}")
+            logging.info(f"Найдено новых треков от подписок: {len(new_tracks)}")
+            
+        except Exception as e:
+            logging.error(f"Ошибка при получении подписок: {e}")
+        
+        return new_tracks
+    
+    def _fetch_followings_tracks(self, user_id: int, cutoff_time: datetime, cutoff_iso: str) -> List[Dict]:
+        """
+        Получить новые треки подписок, опрашивая каждого артиста отдельно
+        
+        Из стрима читаются только последние 50 элементов, при большом числе
+        подписок часть треков в них не попадает. Артисты опрашиваются параллельно
+        (max_workers потоков, общий лимитер запросов).
+        
+        Args:
+            user_id: ID пользователя
+            cutoff_time: Время отсечки
+            cutoff_iso: Время отсечки в формате _ISO_Z_FORMAT
+            
+        Returns:
+            Список новых треков
+        """
+        # limit в soundcloud-v2 - размер страницы, генератор сам подгружает
+        # следующие, поэтому общее число ограничиваем через islice
+        followings_limit = int(self.config.get('followings_limit', 200))
+        self._rate_limiter.acquire()
+        followings = list(islice(self.client.get_user_following(user_id, limit=min(followings_limit, 200)),
+                                 followings_limit))
+        logging.info(f"Опрашиваем подписки по отдельности: {len(followings)} артистов")
+        
+        new_tracks = []
+        fetch = partial(self._fetch_artist_new_tracks, cutoff_time=cutoff_time, cutoff_iso=cutoff_iso)
+        max_workers = max(1, int(self.config.get('max_workers', 6)))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for artist_tracks in executor.map(fetch, followings):
+                new_tracks.extend(artist_tracks)
+        
+        logging.info(f"Найдено новых треков от подписок: {len(new_tracks)}")
+        return new_tracks
+    
+    def _fetch_artist_new_tracks(self, artist, cutoff_time: datetime, cutoff_iso: str) -> List[Dict]:
+        """
+        Новые собственные треки одного артиста из подписок
+        
+        Args:
+            artist: Объект пользователя от SoundCloud API
+            cutoff_time: Время отсечки
+            cutoff_iso: Время отсечки в формате _ISO_Z_FORMAT
+            
+        Returns:
+            Список новых треков артиста
+        """
+        artist_id = getattr(artist, 'id', None)
+        artist_name = getattr(artist, 'username', artist_id)
+        
+        try:
+            self._rate_limiter.acquire()
+            # Свой курсор для ленты треков, отдельно от курсора репостов того же артиста
+            artist_feed = self._paged_feed(self.client.get_user_tracks(artist_id, limit=_FEED_PAGE_SIZE))
+            tracks = self._take_unseen(artist_feed, f'tracks:{artist_id}', cutoff_iso)
+            candidates = self._prefilter_tracks(tracks, cutoff_time, cutoff_iso)
+            
+            get_info = self.get_track_info
+            artist_tracks = []
+            for track, is_candidate in zip(tracks, candidates):
+                if not is_candidate:
                     continue
+                track_dict = get_info(track)
+                if track_dict:
+                    artist_tracks.append(track_dict)
+                    logging.info("✓ Найден новый трек: %s - %s", track_dict['user']['username'], track_dict['title'])
+            return artist_tracks
+        
+        except Exception as e:
+            logging.error("Ошибка при получении треков %s: %s", artist_name, e)
+            if _http_status(e) == 429:
+                self._rate_limiter.pause(_retry_after_delay(getattr(getattr(e, 'response', None), 'headers', None), 0))
+            return []
+    
+    def get_reposts_from_selected_artists(self) -> List[Dict]:
+        """
+        Получить репосты от выбранных артистов
+        
+        Returns:
+            Список треков из репостов
+        """
+        if not self.config['features']['auto_like_reposts'] or not self.config['repost_artists']:
+            return []
+        
+        logging.info("Проверка репостов выбранных артистов...")
+        repost_tracks = []
+        
+        hours_back = int(self.config['hours_lookback'])
+        cutoff_time = datetime.now(timezone.utc) - timedelta(hours=hours_back)
+        logging.info(f"Ищем треки новее чем: {cutoff_time.strftime('%Y-%m-%d %H:%M:%S')} UTC ({hours_back} часов назад)")
+        cutoff_iso = cutoff_time.strftime(_ISO_Z_FORMAT)
+        
+        if self.config.get('async_fetch'):
+            if not AIOHTTP_AVAILABLE:
+                logging.warning("aiohttp не установлен (pip install aiohttp), используем потоки")
+            elif not getattr(self.client, 'client_id', None):
+                logging.warning("У клиента нет client_id для прямых запросов к API, используем потоки")
+            else:
+                repost_tracks = asyncio.run(self._afetch_all_reposts(cutoff_time, cutoff_iso))
+                self.save_user_ids()
+                logging.info(f"Найдено треков из репостов: {len(repost_tracks)}")
+                return repost_tracks
+        
+        # Артисты обрабатываются параллельно, общий лимитер запросов
+        # не даёт потокам превысить ограничения API
+        fetch = partial(self._fetch_repost_tracks, cutoff_time=cutoff_time, cutoff_iso=cutoff_iso)
+        max_workers = max(1, int(self.config.get('max_workers', 6)))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for artist_tracks in executor.map(fetch, self.config['repost_artists']):
+                repost_tracks.extend(artist_tracks)
+        self.save_user_ids()
+        
+        logging.info(f"Найдено треков из репостов: {len(repost_tracks)}")
+        return repost_tracks
+    
+    def _fetch_repost_tracks(self, artist_username: str, cutoff_time: datetime, cutoff_iso: str) -> List[Dict]:
+        """
+        Получить новые репосты одного артиста
+        
+        Args:
+            artist_username: Username артиста
+            cutoff_time: Время отсечки
+            cutoff_iso: Время отсечки в формате _ISO_Z_FORMAT
+            
+        Returns:
+            Список треков из репостов артиста
+        """
+        artist_tracks = []
+        
+        try:
+            # Получаем ID артиста
+            artist_id = self._resolve_user_id(artist_username)
+            
+            logging.info("Получение репостов от %s (ID: %s)...", artist_username, artist_id)
+            
+            # Пробуем получить репосты напрямую
+            reposts_list = []
+            try:
+                # Некоторые версии библиотеки имеют метод get_user_reposts
+                self._rate_limiter.acquire()
+                reposts = self._paged_feed(self.client.get_user_reposts(artist_id, limit=_FEED_PAGE_SIZE))
+                logging.info("  Используем метод get_user_reposts")
+                
+                # get_user_reposts возвращает объекты с полем track
+                for item in self._take_unseen(reposts, artist_id, cutoff_iso):
+                    track = getattr(item, 'track', item)
+                    reposts_list.append(track)
+                
+                tracks_source = reposts_list
+                use_repost_method = True
+                
+            except AttributeError:
+                # Если метода нет, используем get_user_tracks
+                logging.info("  Используем метод get_user_tracks")
+                self._rate_limiter.acquire()
+                tracks_source = self._paged_feed(self.client.get_user_tracks(artist_id, limit=_FEED_PAGE_SIZE))
+                tracks_source = self._take_unseen(tracks_source, artist_id, cutoff_iso)
+                use_repost_method = False
+            
+            artist_tracks = self._scan_artist_tracks(artist_username, artist_id, tracks_source,
+                                                     use_repost_method, cutoff_time, cutoff_iso)
+            
+        except Exception as e:
+            logging.error("Ошибка при получении репостов %s: %s", artist_username, e)
+            if _http_status(e) == 429:
+                # Остальные потоки тоже ждут, а не получают 429 следом
+                self._rate_limiter.pause(_retry_after_delay(getattr(getattr(e, 'response', None), 'headers', None), 0))
+            self._forget_user_id(artist_username, e)
+        
+        return artist_tracks
+    
+    async def _afetch_all_reposts(self, cutoff_time: datetime, cutoff_iso: str) -> List[Dict]:
+        """
+        Асинхронно загрузить репосты всех выбранных артистов
+        
+        Все запросы идут одновременно через одну aiohttp сессию с пулом соединений.
+        """
+        semaphore = asyncio.Semaphore(max(1, int(self.config.get('max_workers', 6))))
+        headers = {}
+        if self.config.get('auth_token'):
+            headers['Authorization'] = f"OAuth {self.config['auth_token']}"
+        
+        connector = aiohttp.TCPConnector(limit=16)
+        async with aiohttp.ClientSession(connector=connector, headers=headers) as session:
+            results = await asyncio.gather(*[
+                self._afetch_repost_tracks(session, semaphore, artist_username, cutoff_time, cutoff_iso)
+                for artist_username in self.config['repost_artists']
+            ])
+        
+        return [track for artist_tracks in results for track in artist_tracks]
+    
+    async def _aget_json(self, session, semaphore: asyncio.Semaphore, path: str, **params):
+        """
+        GET запрос к api-v2 с повтором при 429 (Too Many Requests)
+        
+        Ответы кешируются между циклами: в течение api_cache_ttl_seconds
+        запрос не отправляется, затем отправляется условный запрос
+        (If-None-Match / If-Modified-Since) и при 304 берётся сохранённый ответ.
+        
+        Args:
+            session: aiohttp.ClientSession
+            semaphore: Ограничение числа одновременных запросов
+            path: Путь запроса (например /resolve)
+            **params: Параметры запроса
+            
+        Returns:
+            Разобранный JSON ответа
+        """
+        cache_key = (path, tuple(sorted(params.items())))
+        cached = self._http_cache.get(cache_key)
+        headers = {}
+        if cached is not None:
+            fetched_at, etag, last_modified, payload = cached
+            if time.monotonic() - fetched_at < float(self.config.get('api_cache_ttl_seconds', 300)):
+                return payload
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+        
+        params['client_id'] = self.client.client_id
+        
+        for attempt in range(4):
+            await self._rate_limiter.acquire_async()
+            async with semaphore:
+                async with session.get(_API_V2_URL + path, params=params, headers=headers) as response:
+                    if response.status != 429:
+                        etag = response.headers.get('ETag')
+                        last_modified = response.headers.get('Last-Modified')
+                        if response.status == 304 and cached is not None:
+                            # 304 не обязан повторять валидаторы - оставляем сохранённые
+                            etag = etag or cached[1]
+                            last_modified = last_modified or cached[2]
+                            payload = cached[3]
+                        else:
+                            response.raise_for_status()
+                            payload = await response.json(loads=_json_loads)
+                        self._http_cache[cache_key] = (time.monotonic(), etag, last_modified, payload)
+                        return payload
+                    delay = _retry_after_delay(response.headers, attempt)
+            
+            # Пауза общая для всех запросов: следующий acquire_async дождётся её
+            logging.warning("API вернул 429, повтор через %s с", delay)
+            self._rate_limiter.pause(delay)
+        
+        raise RuntimeError(f"Превышен лимит запросов к API: {path}")
+    
+    async def _aresolve_user_id(self, session, semaphore: asyncio.Semaphore, username: str) -> int:
+        """Асинхронный вариант _resolve_user_id (с тем же кешем)"""
+        user_id = self._user_ids.get(username)
+        if user_id is not None:
+            return user_id
+        
+        user = await self._aget_json(session, semaphore, '/resolve', url=f'https://soundcloud.com/{username}')
+        with self._cache_lock:
+            self._user_ids[username] = user['id']
+            self._user_ids_dirty = True
+        return user['id']
+    
+    async def _aget_feed(self, session, semaphore: asyncio.Semaphore, path: str, stop_at: str) -> List:
+        """
+        Загрузить ленту api-v2 постранично (по next_href)
+        
+        Следующая страница запрашивается, пока последний элемент страницы
+        новее stop_at, и не больше _FEED_MAX_ITEMS элементов.
+        
+        Returns:
+            Элементы ленты объектами с атрибутами
+        """
+        items = []
+        params = {'limit': _FEED_PAGE_SIZE}
+        while True:
+            data = await self._aget_json(session, semaphore, path, **params)
+            page = data.get('collection', [])
+            items.extend(page)
+            next_href = data.get('next_href')
+            if not page or not next_href or len(items) >= _FEED_MAX_ITEMS:
+                break
+            oldest = _created_at_iso(page[-1].get('created_at', ''))
+            if oldest and oldest <= stop_at:
+                break
+            # next_href - полный URL с курсором страницы, client_id добавит _aget_json
+            next_url = urlsplit(next_href)
+            path = next_url.path
+            params = dict(parse_qsl(next_url.query))
+            params.pop('client_id', None)
+        return _to_api_object(items[:_FEED_MAX_ITEMS])
+    
+    async def _afetch_repost_tracks(self, session, semaphore: asyncio.Semaphore, artist_username: str,
+                                    cutoff_time: datetime, cutoff_iso: str) -> List[Dict]:
+        """Асинхронный вариант _fetch_repost_tracks"""
+        artist_tracks = []
+        
+        try:
+            artist_id = await self._aresolve_user_id(session, semaphore, artist_username)
+            logging.info("Получение репостов от %s (ID: %s)...", artist_username, artist_id)
             
-            logging.info(f"Обработано элементов стрима: {total_items}")
-            logging.info(f"Найдено новых треков от подписок: {len(new_tracks)}")
+            reposts = await self._aget_feed(session, semaphore, f'/stream/users/{artist_id}/reposts',
+                                            self._feed_stop_at(artist_id, cutoff_iso))
+            tracks_source = [getattr(item, 'track', item) for item in self._take_unseen(reposts, artist_id, cutoff_iso)]
+            
+            artist_tracks = self._scan_artist_tracks(artist_username, artist_id, tracks_source,
+                                                     True, cutoff_time, cutoff_iso)
             
         except Exception as e:
-            logging.error(f"Ошибка при получении подписок: {e}")
+            logging.error("Ошибка при получении репостов %s: %s", artist_username, e)
+            self._forget_user_id(artist_username, e)
         
-        return new_tracks
+        return artist_tracks
     
-    def get_reposts_from_selected_artists(self) -> List[Dict]:
+    def _scan_artist_tracks(self, artist_username: str, artist_id: int, tracks_source: List,
+                            use_repost_method: bool, cutoff_time: datetime, cutoff_iso: str) -> List[Dict]:
         """
-        Получить репосты от выбранных артистов
+        Отобрать новые репосты из загруженной ленты артиста
         
+        Args:
+            artist_username: Username артиста
+            artist_id: ID артиста
+            tracks_source: Треки из ленты артиста
+            use_repost_method: True если лента получена через get_user_reposts
+            cutoff_time: Время отсечки
+            cutoff_iso: Время отсечки в формате _ISO_Z_FORMAT
+            
         Returns:
-            Список треков из репостов
+            Список треков из репостов артиста
         """
-        if not self.config['features']['auto_like_reposts']:
-            return []
+        artist_tracks = []
         
-        logging.info("Проверка репостов выбранных артистов...")
-        repost_tracks = []
+        candidates = self._prefilter_tracks(tracks_source, cutoff_time, cutoff_iso)
         
-        hours_back = int(self.config['hours_lookback'])
-        cutoff_time = datetime.now() - timedelta(hours=hours_back)
-        logging.info(f"Ищем треки новее чем: {cutoff_time.strftime('%Y-%m-%d %H:%M:%S')} ({hours_back} часов назад)")
+        # Локальные ссылки вместо поиска атрибутов self на каждой итерации
+        check_processed = self.is_processed
+        check_recent = self.is_created_recent
+        get_info = self.get_track_info
+        append_track = artist_tracks.append
         
-        for artist_username in self.config['repost_artists']:
+        repost_count = 0
+        items = zip(tracks_source, candidates)
+        
+        # ВСЕГДА логируем первые 5 треков для отладки
+        for track_count, (track, _) in zip(range(1, 6), items):
             try:
-                # Получаем информацию об артисте
-                artist_url = f'https://soundcloud.com/{artist_username}'
-                artist = self.client.resolve(artist_url)
+                track_dict = get_info(track)
                 
-                logging.info(f"Получение репостов от {artist_username} (ID: {artist.id})...")
+                if not track_dict or not track_dict.get('id'):
+                    continue
                 
-                # Пробуем получить репосты напрямую
-                reposts_list = []
-                try:
-                    # Некоторые версии библиотеки имеют метод get_user_reposts
-                    reposts = self.client.get_user_reposts(artist.id, limit=20)
-                    logging.info(f"  Используем метод get_user_reposts")
-                    
-                    # get_user_reposts возвращает объекты с полем track
-                    for item in reposts:
-                        track = getattr(item, 'track', item)
-                        reposts_list.append(track)
-                    
-                    tracks_source = reposts_list
-                    use_repost_method = True
-                    
-                except AttributeError:
-                    # Если метода нет, используем get_user_tracks
-                    logging.info(f"  Используем метод get_user_tracks")
-                    tracks_source = self.client.get_user_tracks(artist.id, limit=20)
-                    use_repost_method = False
+                # Если используем get_user_reposts - все треки уже репосты
+                # Если используем get_user_tracks - нужно проверять автора
+                if use_repost_method:
+                    is_repost = True  # Все из get_user_reposts это репосты
+                else:
+                    is_repost = track_dict['user']['id'] != artist_id
                 
-                track_count = 0
-                repost_count = 0
+                is_recent = check_recent(track_dict['created_at'], cutoff_time, cutoff_iso)
+                is_processed = check_processed(track_dict['id'])
                 
-                for track in tracks_source:
-                    track_count += 1
-                    try:
-                        track_dict = self.get_track_info(track)
-                        
-                        if not track_dict or not track_dict.get('id'):
-                            continue
-                        
-                        # Если используем get_user_reposts - все треки уже репосты
-                        # Если используем get_user_tracks - нужно проверять автора
-                        if use_repost_method:
-                            is_repost = True  # Все из get_user_reposts это репосты
-                        else:
-                            is_repost = track_dict['user']['id'] != artist.id
-                        
-                        is_recent = self.is_track_recent(track_dict, cutoff_time)
-                        is_processed = track_dict['id'] in self.processed_tracks
-                        
-                        created_at = track_dict.get('created_at', 'unknown')
-                        
-                        # ВСЕГДА логируем первые 5 треков для отладки
-                        if track_count <= 5:
-                            logging.info(f"  Трек #{track_count}: {track_dict['user']['username']} - {track_dict['title']}")
-                            logging.info(f"    Created: {created_at} | Is repost: {is_repost} | Recent: {is_recent} | Processed: {is_processed}")
-                        
-                        if is_repost:
-                            repost_count += 1
-                            if track_count > 5:  # Если не логировали выше
-                                logging.info(f"  Репост #{repost_count}: {track_dict['user']['username']} - {track_dict['title']}")
-                                logging.info(f"    Created: {created_at} | Recent: {is_recent} | Processed: {is_processed}")
-                        
-                        if (is_repost and 
-                            track_dict['id'] not in self.processed_tracks and 
-                            is_recent):
-                            repost_tracks.append(track_dict)
-                            logging.info(f"✓ Найден новый репост от {artist_username}: {track_dict['user']['username']} - {track_dict['title']}")
-                    
-                    except Exception as e:
-                        logging.error(f"Ошибка при обработке трека #{track_count}: {e}")
-                        continue
+                created_at = track_dict.get('created_at', 'unknown')
                 
-                logging.info(f"  Всего треков: {track_count}, из них репостов: {repost_count}")
-                time.sleep(1)  # Задержка между артистами
+                logging.info("  Трек #%d: %s - %s", track_count, track_dict['user']['username'], track_dict['title'])
+                logging.info("    Created: %s | Is repost: %s | Recent: %s | Processed: %s",
+                             created_at, is_repost, is_recent, is_processed)
                 
+                if is_repost:
+                    repost_count += 1
+                
+                if is_repost and not is_processed and is_recent:
+                    append_track(track_dict)
+                    logging.info("✓ Найден новый репост от %s: %s - %s",
+                                 artist_username, track_dict['user']['username'], track_dict['title'])
+            
             except Exception as e:
-                logging.error(f"Ошибка при получении репостов {artist_username}: {e}")
-                continue
+                logging.error("Ошибка при обработке трека #%d: %s", track_count, e)
         
-        logging.info(f"Найдено треков из репостов: {len(repost_tracks)}")
-        return repost_tracks
+        # Остальные: уже обработанные и старые треки отсечены предфильтром,
+        # для них только считаем репосты
+        for track_count, (track, is_candidate) in enumerate(items, 6):
+            try:
+                if not is_candidate:
+                    if getattr(track, 'id', None) and (
+                            use_repost_method or getattr(getattr(track, 'user', None), 'id', None) != artist_id):
+                        repost_count += 1
+                    continue
+                
+                track_dict = get_info(track)
+                
+                if not track_dict:
+                    continue
+                
+                if not use_repost_method and track_dict['user']['id'] == artist_id:
+                    continue
+                
+                repost_count += 1
+                append_track(track_dict)
+                logging.info("  Репост #%d: %s - %s", repost_count, track_dict['user']['username'], track_dict['title'])
+                logging.info("✓ Найден новый репост от %s: %s - %s",
+                             artist_username, track_dict['user']['username'], track_dict['title'])
+            
+            except Exception as e:
+                logging.error("Ошибка при обработке трека #%d: %s", track_count, e)
+        
+        logging.info("  Всего треков: %d, из них репостов: %d", len(tracks_source), repost_count)
+        
+        return artist_tracks
+    
+    def _prefilter_tracks(self, tracks: List, cutoff_time: datetime, cutoff_iso: str) -> List[bool]:
+        """
+        Предварительный отбор треков одним проходом по сырым объектам API
+        
+        Args:
+            tracks: Объекты треков от SoundCloud API
+            cutoff_time: Время отсечки
+            cutoff_iso: Время отсечки в формате _ISO_Z_FORMAT
+            
+        Returns:
+            Для каждого трека: True если у него есть ID, он не обработан и достаточно новый
+        """
+        keep = self._make_keep_predicate(cutoff_time, cutoff_iso)
+        return [keep(getattr(track, 'id', None), getattr(track, 'created_at', '')) for track in tracks]
+    
+    def _make_keep_predicate(self, cutoff_time: datetime, cutoff_iso: str):
+        """
+        Собрать проверку "не обработан и достаточно новый" один раз на цикл
+        
+        Args:
+            cutoff_time: Время отсечки
+            cutoff_iso: Время отсечки в формате _ISO_Z_FORMAT
+            
+        Returns:
+            Функция keep(track_id, created_at) -> bool
+        """
+        processed = self.processed_tracks
+        # Как в is_processed: Bloom-фильтр окупается только перед _SortedIdSet
+        use_bloom = isinstance(processed, _SortedIdSet)
+        bloom = self._bloom
+        bloom_hash = _bloom_hash
+        check_recent = self.is_created_recent
+        
+        def keep(track_id, created_at) -> bool:
+            if not track_id:
+                return False
+            if use_bloom:
+                h = bloom_hash(track_id)
+                if bloom[h >> 3] & (1 << (h & 7)) and track_id in processed:
+                    return False
+            elif track_id in processed:
+                return False
+            # datetime от soundcloud-v2 приводим к строке того же формата, что и cutoff_iso
+            if isinstance(created_at, datetime):
+                created_at = _created_at_iso(created_at)
+            # Строки ISO-8601 сравниваем сразу, остальные форматы - через is_created_recent
+            if isinstance(created_at, str) and len(created_at) == 20 and created_at[-1] == 'Z':
+                return created_at > cutoff_iso
+            return check_recent(created_at, cutoff_time, cutoff_iso)
+        
+        return keep
     
     def test_show_followings(self):
         """Показать список подписок для отладки"""
@@ -501,135 +1665,50 @@ class SoundCloudAutoLiker:
         except Exception as e:
             logging.error(f"Ошибка: {e}")
     
+    def is_track_recent(self, track: Dict, cutoff_time: datetime, cutoff_iso: str = None) -> bool:
         """
-        Получить репосты от выбранных артистов
+        Проверить что трек недавний
         
+        Args:
+            track: Словарь с данными трека
+            cutoff_time: Время отсечки
+            cutoff_iso: Время отсечки в формате _ISO_Z_FORMAT (для быстрой проверки)
+            
         Returns:
-            Список треков из репостов
+            True если трек новый
         """
-        if not self.config['features']['auto_like_reposts']:
-            return []
-        
-        logging.info("Проверка репостов выбранных артистов...")
-        repost_tracks = []
-        
-        hours_back = int(self.config['hours_lookback'])
-        cutoff_time = datetime.now() - timedelta(hours=hours_back)
-        logging.info(f"Ищем треки новее чем: {cutoff_time.strftime('%Y-%m-%d %H:%M:%S')} ({hours_back} часов назад)")
-        
-        for artist_username in self.config['repost_artists']:
-            try:
-                # Получаем информацию об артисте
-                artist_url = f'https://soundcloud.com/{artist_username}'
-                artist = self.client.resolve(artist_url)
-                
-                logging.info(f"Получение репостов от {artist_username} (ID: {artist.id})...")
-                
-                # Пробуем получить репосты напрямую
-                reposts_list = []
-                try:
-                    # Некоторые версии библиотеки имеют метод get_user_reposts
-                    reposts = self.client.get_user_reposts(artist.id, limit=20)
-                    logging.info(f"  Используем метод get_user_reposts")
-                    
-                    # get_user_reposts возвращает объекты с полем track
-                    for item in reposts:
-                        track = getattr(item, 'track', item)
-                        reposts_list.append(track)
-                    
-                    tracks_source = reposts_list
-                    use_repost_method = True
-                    
-                except AttributeError:
-                    # Если метода нет, используем get_user_tracks
-                    logging.info(f"  Используем метод get_user_tracks")
-                    tracks_source = self.client.get_user_tracks(artist.id, limit=20)
-                    use_repost_method = False
-                
-                track_count = 0
-                repost_count = 0
-                
-                for track in tracks_source:
-                    track_count += 1
-                    try:
-                        track_dict = self.get_track_info(track)
-                        
-                        if not track_dict or not track_dict.get('id'):
-                            continue
-                        
-                        # Если используем get_user_reposts - все треки уже репосты
-                        # Если используем get_user_tracks - нужно проверять автора
-                        if use_repost_method:
-                            is_repost = True  # Все из get_user_reposts это репосты
-                        else:
-                            is_repost = track_dict['user']['id'] != artist.id
-                        
-                        is_recent = self.is_track_recent(track_dict, cutoff_time)
-                        is_processed = track_dict['id'] in self.processed_tracks
-                        
-                        created_at = track_dict.get('created_at', 'unknown')
-                        
-                        # ВСЕГДА логируем первые 5 треков для отладки
-                        if track_count <= 5:
-                            logging.info(f"  Трек #{track_count}: {track_dict['user']['username']} - {track_dict['title']}")
-                            logging.info(f"    Created: {created_at} | Is repost: {is_repost} | Recent: {is_recent} | Processed: {is_processed}")
-                        
-                        if is_repost:
-                            repost_count += 1
-                            if track_count > 5:  # Если не логировали выше
-                                logging.info(f"  Репост #{repost_count}: {track_dict['user']['username']} - {track_dict['title']}")
-                                logging.info(f"    Created: {created_at} | Recent: {is_recent} | Processed: {is_processed}")
-                        
-                        if (is_repost and 
-                            track_dict['id'] not in self.processed_tracks and 
-                            is_recent):
-                            repost_tracks.append(track_dict)
-                            logging.info(f"✓ Найден новый репост от {artist_username}: {track_dict['user']['username']} - {track_dict['title']}")
-                    
-                    except Exception as e:
-                        logging.error(f"Ошибка при обработке трека #{track_count}: {e}")
-                        continue
-                
-                logging.info(f"  Всего треков: {track_count}, из них репостов: {repost_count}")
-                time.sleep(1)  # Задержка между артистами
-                
-            except Exception as e:
-                logging.error(f"Ошибка при получении репостов {artist_username}: {e}")
-                continue
-        
-        logging.info(f"Найдено треков из репостов: {len(repost_tracks)}")
-        return repost_tracks
+        return self.is_created_recent(track.get('created_at', ''), cutoff_time, cutoff_iso)
     
-    def is_track_recent(self, track: Dict, cutoff_time: datetime) -> bool:
+    def is_created_recent(self, created_at, cutoff_time: datetime, cutoff_iso: str = None) -> bool:
         """
-        Проверить что трек недавний
+        Проверить что время создания трека позже времени отсечки
         
         Args:
-            track: Словарь с данными трека
-            cutoff_time: Время отсечки
+            created_at: Поле created_at трека
+            cutoff_time: Время отсечки (UTC, с timezone)
+            cutoff_iso: Время отсечки в формате _ISO_Z_FORMAT (для быстрой проверки)
             
         Returns:
             True если трек новый
         """
         try:
-            created_at = track.get('created_at', '')
             if not created_at:
                 return True
             
-            # Парсим дату
-            # Формат может быть: 2024-10-30T12:34:56Z
-            created_at = created_at.replace('Z', '+00:00')
-            if '+00:00' in created_at:
-                track_time = datetime.fromisoformat(created_at)
-            else:
-                track_time = datetime.fromisoformat(created_at)
+            # soundcloud-v2 отдаёт datetime: сравниваем напрямую (без timezone - это UTC)
+            if isinstance(created_at, datetime):
+                if created_at.tzinfo is None:
+                    created_at = created_at.replace(tzinfo=timezone.utc)
+                return created_at > cutoff_time
             
-            # Убираем timezone для сравнения
-            track_time = track_time.replace(tzinfo=None)
+            # Быстрый путь: строки ISO-8601 одного формата сравниваются
+            # лексикографически так же, как сравнивались бы даты
+            if cutoff_iso and isinstance(created_at, str) and len(created_at) == 20 and created_at[-1] == 'Z':
+                return created_at > cutoff_iso
             
-            return track_time > cutoff_time
+            return _parse_created_at(created_at) > cutoff_time
         except Exception as e:
-            logging.debug(f"Не удалось определить время трека: {e}")
+            logging.debug("Не удалось определить время трека: %s", e)
             return True
     
     def apply_filters(self, track: Dict) -> bool:
@@ -642,30 +1721,8 @@ class SoundCloudAutoLiker:
         Returns:
             True если трек проходит фильтры
         """
-        filters = self.config['filters']
-        
-        # Проверка длительности
-        duration_ms = track.get('duration', 0)
-        duration_seconds = duration_ms / 1000
-        
-        if filters['min_duration_seconds'] > 0 and duration_seconds < filters['min_duration_seconds']:
-            return False
-        
-        if filters['max_duration_seconds'] > 0 and duration_seconds > filters['max_duration_seconds']:
-            return False
-        
-        # Проверка жанра
-        genre = track.get('genre', '').lower()
-        filter_genres = [g.lower() for g in filters['genres']]
-        if filter_genres and genre not in filter_genres:
-            return False
-        
-        # Проверка минимального количества лайков
-        likes_count = track.get('likes_count', 0)
-        if likes_count < filters['min_likes']:
-            return False
-        
-        return True
+        # Длительность, жанр и минимум лайков - в замыкании из _compile_filters
+        return self._filter_fn(track)
     
     def init_selenium_driver(self):
         """Инициализация Selenium WebDriver"""
@@ -816,7 +1873,7 @@ class SoundCloudAutoLiker:
                     continue
             
             if not like_button:
-                logging.warning(f"Не найдена кнопка лайка на странице {track_url}")
+                logging.warning("Не найдена кнопка лайка на странице %s", track_url)
                 return False
             
             # Проверяем не лайкнут ли уже трек
@@ -835,7 +1892,7 @@ class SoundCloudAutoLiker:
             return True
             
         except Exception as e:
-            logging.error(f"Ошибка при лайке через Selenium: {e}")
+            logging.error("Ошибка при лайке через Selenium: %s", e)
             return False
     
     def close_selenium(self):
@@ -849,12 +1906,14 @@ class SoundCloudAutoLiker:
             self.driver = None
             self.selenium_logged_in = False
     
-    def like_track(self, track: Dict) -> bool:
+    def like_track(self, track: Dict, use_api: bool = None) -> bool:
         """
         Лайкнуть трек
         
         Args:
             track: Словарь с данными трека
+            use_api: Лайкать через API (None - проверить config; process_tracks
+                передаёт значение, вычисленное один раз на цикл)
             
         Returns:
             True если успешно
@@ -862,15 +1921,20 @@ class SoundCloudAutoLiker:
         track_title = track.get('title', 'Unknown')
         artist_name = track.get('user', {}).get('username', 'Unknown')
         permalink_url = track.get('permalink_url', '')
-        duration = track.get('duration', 0) / 1000  # в секундах
-        likes = track.get('likes_count', 0)
         
         if self.config['dry_run']:
-            logging.info(f"[DRY RUN] Лайкнули бы: {artist_name} - {track_title}")
-            logging.info(f"           Длительность: {int(duration//60)}:{int(duration%60):02d} | Лайков: {likes}")
-            logging.info(f"           URL: {permalink_url}")
+            duration = track.get('duration', 0) / 1000  # в секундах
+            logging.info("[DRY RUN] Лайкнули бы: %s - %s", artist_name, track_title)
+            logging.info("           Длительность: %d:%02d | Лайков: %s",
+                         duration // 60, duration % 60, track.get('likes_count', 0))
+            logging.info("           URL: %s", permalink_url)
             return True
         
+        if use_api is None:
+            use_api = self._api_likes_enabled()
+        if use_api:
+            return self.api_like_track(track)
+        
         # Реальный лайк через Selenium
         if not SELENIUM_AVAILABLE:
             logging.error("Selenium не установлен. Установите: pip install selenium")
@@ -881,8 +1945,8 @@ class SoundCloudAutoLiker:
             success = self.selenium_like_track(permalink_url)
             
             if success:
-                logging.info(f"✓ Лайкнули: {artist_name} - {track_title}")
-                logging.info(f"  URL: {permalink_url}")
+                logging.info("✓ Лайкнули: %s - %s", artist_name, track_title)
+                logging.info("  URL: %s", permalink_url)
                 
                 # Задержка между лайками
                 delay = self.config['selenium'].get('delay_between_likes', 2)
@@ -891,9 +1955,158 @@ class SoundCloudAutoLiker:
             return success
             
         except Exception as e:
-            logging.error(f"Ошибка при лайке трека: {e}")
+            logging.error("Ошибка при лайке трека: %s", e)
             return False
     
+    def _api_likes_enabled(self) -> bool:
+        """Проверить что лайки можно ставить через API (config: api_likes)"""
+        if not self.config.get('api_likes') or self.config['dry_run']:
+            return False
+        if not self.config.get('auth_token'):
+            logging.warning("Для лайков через API нужен auth_token в config.json, лайкаем через Selenium")
+            return False
+        if not (AIOHTTP_AVAILABLE or HTTPX_HTTP2_AVAILABLE or urllib3 is not None):
+            logging.warning("Для лайков через API нужен httpx, aiohttp или urllib3, лайкаем через Selenium")
+            return False
+        return True
+    
+    def _get_like_pool(self):
+        """
+        Пул соединений urllib3 для лайков через API
+        
+        Один пул на всё время работы: TCP/TLS соединения переиспользуются
+        между лайками, временные ошибки (429, 502, 503) повторяются urllib3.
+        Без Session/PreparedRequest из requests - запрос с готовым URL и заголовками.
+        """
+        if self._like_pool is None:
+            retries = urllib3.Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 502, 503],
+                                    raise_on_status=False)
+            self._like_pool = urllib3.PoolManager(
+                num_pools=4, maxsize=32, retries=retries, timeout=30,
+                headers={'Authorization': f"OAuth {self.config['auth_token']}"})
+        return self._like_pool
+    
+    def api_like_track(self, track: Dict) -> bool:
+        """
+        Лайкнуть трек через API (синхронно, через общий пул соединений)
+        
+        Args:
+            track: Словарь с данными трека
+            
+        Returns:
+            True если успешно
+        """
+        track_title = track.get('title', 'Unknown')
+        artist_name = track.get('user', {}).get('username', 'Unknown')
+        
+        try:
+            user_id = self._resolve_user_id(self.config['your_username'])
+            url = f"{_API_V2_URL}/users/{user_id}/track_likes/{track['id']}"
+            # Для PUT urllib3 кладёт fields в тело, поэтому client_id - прямо в URL
+            response = self._get_like_pool().request('PUT', f"{url}?{urlencode({'client_id': self.client.client_id})}")
+            if not 200 <= response.status < 300:
+                logging.error("Ошибка при лайке трека %s через API: HTTP %d", track_title, response.status)
+                return False
+            logging.info("✓ Лайкнули: %s - %s", artist_name, track_title)
+            return True
+        
+        except Exception as e:
+            logging.error("Ошибка при лайке трека %s через API: %s", track_title, e)
+            return False
+    
+    async def _alike_tracks(self, tracks: List[Dict]) -> List[int]:
+        """
+        Лайкнуть треки через API одновременными запросами
+        
+        Число запросов в полёте ограничено семафором (like_concurrency),
+        частота - ограничителем (likes_per_second). С httpx[http2] все лайки
+        мультиплексируются в одном HTTP/2 соединении, иначе идут через aiohttp.
+        
+        Args:
+            tracks: Треки, прошедшие фильтры
+            
+        Returns:
+            ID успешно лайкнутых треков
+        """
+        semaphore = asyncio.Semaphore(max(1, int(self.config.get('like_concurrency', 8))))
+        limiter = self._like_limiter
+        headers = {'Authorization': f"OAuth {self.config['auth_token']}"}
+        
+        if HTTPX_HTTP2_AVAILABLE:
+            limits = httpx.Limits(max_connections=32, max_keepalive_connections=32)
+            session = httpx.AsyncClient(http2=True, headers=headers, limits=limits, timeout=30)
+        else:
+            connector = aiohttp.TCPConnector(limit=64, limit_per_host=8)
+            session = aiohttp.ClientSession(connector=connector, headers=headers)
+        
+        async with session:
+            try:
+                if HTTPX_HTTP2_AVAILABLE:
+                    user_id = await asyncio.to_thread(self._resolve_user_id, self.config['your_username'])
+                else:
+                    user_id = await self._aresolve_user_id(session, semaphore, self.config['your_username'])
+            except Exception as e:
+                logging.error(f"Не удалось получить ID пользователя для лайков: {e}")
+                return []
+            
+            results = await asyncio.gather(*[
+                self._alike_track(session, semaphore, limiter, user_id, track) for track in tracks
+            ], return_exceptions=True)
+        
+        liked_ids = []
+        for track, result in zip(tracks, results):
+            if isinstance(result, Exception):
+                logging.error("Ошибка при лайке трека %s: %s", track.get('title', 'Unknown'), result)
+            elif result:
+                liked_ids.append(track['id'])
+        return liked_ids
+    
+    async def _alike_track(self, session, semaphore: asyncio.Semaphore, limiter: _RateLimiter,
+                           user_id: int, track: Dict) -> bool:
+        """
+        Лайкнуть один трек через API с повтором при 429 (Too Many Requests)
+        
+        Returns:
+            True если успешно
+        """
+        url = f"{_API_V2_URL}/users/{user_id}/track_likes/{track['id']}"
+        params = {'client_id': self.client.client_id}
+        
+        for attempt in range(4):
+            await limiter.acquire_async()
+            async with semaphore:
+                status, headers = await self._aput(session, url, params)
+            if status != 429:
+                logging.info("✓ Лайкнули: %s - %s",
+                             track.get('user', {}).get('username', 'Unknown'), track.get('title', 'Unknown'))
+                return True
+            
+            delay = _retry_after_delay(headers, attempt)
+            logging.warning("API вернул 429, повтор через %s с", delay)
+            limiter.pause(delay)
+        
+        logging.error("Превышен лимит запросов к API, трек не лайкнут: %s", track.get('title', 'Unknown'))
+        return False
+    
+    @staticmethod
+    async def _aput(session, url: str, params: Dict):
+        """
+        PUT запрос через httpx.AsyncClient или aiohttp.ClientSession
+        
+        Returns:
+            (HTTP статус, заголовки ответа); ошибки HTTP, кроме 429, - исключение
+        """
+        if HTTPX_HTTP2_AVAILABLE and isinstance(session, httpx.AsyncClient):
+            response = await session.put(url, params=params)
+            if response.status_code != 429:
+                response.raise_for_status()
+            return response.status_code, response.headers
+        
+        async with session.put(url, params=params) as response:
+            if response.status != 429:
+                response.raise_for_status()
+            return response.status, response.headers
+    
     def process_tracks(self, tracks: List[Dict]):
         """
         Обработать список треков
@@ -904,55 +2117,87 @@ class SoundCloudAutoLiker:
         liked_count = 0
         filtered_count = 0
         
+        # Настройки проверяются один раз на цикл, а не для каждого трека.
+        # С httpx/aiohttp лайки через API уходят одновременно, без них - по одному через urllib3
+        use_api = self._api_likes_enabled()
+        api_likes = (HTTPX_HTTP2_AVAILABLE or AIOHTTP_AVAILABLE) and use_api
+        queued_tracks = []
+        
+        # Локальные ссылки вместо поиска атрибутов self на каждой итерации;
+        # track_filter - замыкание из _compile_filters (то же, что в apply_filters)
+        track_filter = self._filter_fn
+        like = self.like_track
+        mark = self.mark_processed
+        queue_track = queued_tracks.append
+        acquire_like = None if self.config['dry_run'] else self._like_limiter.acquire
+        
         for track in tracks:
+            track_id = track.get('id')
             try:
-                # Применяем фильтры
-                if not self.apply_filters(track):
+                if not track_filter(track):
                     filtered_count += 1
-                    track_id = track.get('id')
                     if track_id:
-                        self.processed_tracks.add(track_id)
+                        mark(track_id)
+                    continue
+                
+                # Лайки через API отправляются пачкой после цикла
+                if api_likes:
+                    queue_track(track)
                     continue
                 
-                # Лайкаем трек
-                if self.like_track(track):
+                # Лайкаем трек (частоту ограничивает likes_per_second, в dry_run запросов нет)
+                if acquire_like is not None:
+                    acquire_like()
+                if like(track, use_api):
                     liked_count += 1
-                    track_id = track.get('id')
                     if track_id:
-                        self.processed_tracks.add(track_id)
-                
-                time.sleep(1)  # Задержка между лайками
+                        mark(track_id)
                 
             except Exception as e:
-                track_title = track.get('title', 'Unknown')
-                logging.error(f"Ошибка при обработке трека {track_title}: {e}")
+                logging.error("Ошибка при обработке трека %s: %s", track.get('title', 'Unknown'), e)
+        
+        if queued_tracks:
+            for track_id in asyncio.run(self._alike_tracks(queued_tracks)):
+                liked_count += 1
+                self.mark_processed(track_id)
         
         if filtered_count > 0:
             logging.info(f"Отфильтровано треков: {filtered_count}")
         logging.info(f"Обработано треков: {liked_count}")
         self.save_processed_tracks()
     
+    async def _afetch_cycle_tracks(self):
+        """
+        Загрузить треки подписок и репосты параллельно
+        
+        Источники независимы, поэтому время загрузки - максимум из двух,
+        а не сумма. Оба метода синхронные и выполняются в отдельных потоках.
+        Выключенный источник (или пустой repost_artists) не запускается вовсе.
+        
+        Returns:
+            (новые треки от подписок, треки из репостов)
+        """
+        def fetch_if(enabled, fetch):
+            return asyncio.to_thread(fetch) if enabled else asyncio.sleep(0, result=[])
+        
+        features = self.config['features']
+        return await asyncio.gather(
+            fetch_if(features['auto_like_new_tracks'], self.get_new_tracks_from_followings),
+            fetch_if(features['auto_like_reposts'] and self.config['repost_artists'],
+                     self.get_reposts_from_selected_artists),
+        )
+    
     def run_once(self):
         """Один цикл проверки и обработки треков"""
         logging.info("=" * 50)
         logging.info("Начало цикла проверки")
         
-        all_tracks = []
-        
-        # Получаем новые треки от подписок
-        new_tracks = self.get_new_tracks_from_followings()
-        all_tracks.extend(new_tracks)
-        
-        # Получаем репосты выбранных артистов
-        repost_tracks = self.get_reposts_from_selected_artists()
-        all_tracks.extend(repost_tracks)
+        # Новые треки от подписок и репосты выбранных артистов загружаются одновременно
+        new_tracks, repost_tracks = asyncio.run(self._afetch_cycle_tracks())
         
-        # Удаляем дубликаты
-        unique_tracks = {}
-        for track in all_tracks:
-            track_id = track.get('id')
-            if track_id and track_id not in unique_tracks:
-                unique_tracks[track_id] = track
+        # Удаляем дубликаты: ключ остаётся на месте первого вхождения,
+        # значение - последнее (данные трека в обоих источниках одинаковые)
+        unique_tracks = {track['id']: track for track in chain(new_tracks, repost_tracks) if track.get('id')}
         
         logging.info(f"Всего уникальных треков для обработки: {len(unique_tracks)}")
         
@@ -962,8 +2207,91 @@ class SoundCloudAutoLiker:
         else:
             logging.info("Новых треков не найдено")
         
+        # Курсоры двигаем только после обработки найденных треков:
+        # неудачные лайки остаются за курсором и повторяются в следующем цикле
+        self.save_artist_cursors(unique_tracks.keys())
+        
         logging.info("Цикл завершен")
     
+    async def run_async(self):
+        """
+        Цикл проверок на asyncio
+        
+        Ожидание между циклами не блокирует процесс: SIGINT/SIGTERM
+        обрабатываются сразу, а начатый цикл завершается до остановки.
+        Повторный сигнал прерывает и начатый цикл (как Ctrl+C без asyncio).
+        run_once выполняется в отдельном потоке - внутри он сам запускает asyncio.run.
+        """
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        signals = (signal.SIGINT, signal.SIGTERM)
+        
+        def request_stop():
+            logging.info("Получен сигнал остановки, завершаем работу после текущего цикла "
+                         "(повторный сигнал - немедленно)...")
+            stop.set()
+            # Дальше сигналы снова обрабатываются по умолчанию: KeyboardInterrupt / завершение
+            for sig in signals:
+                loop.remove_signal_handler(sig)
+        
+        for sig in signals:
+            try:
+                loop.add_signal_handler(sig, request_stop)
+            except NotImplementedError:
+                pass  # Windows: остановка по Ctrl+C через KeyboardInterrupt
+        
+        status_runner = await self._start_status_server()
+        try:
+            while not stop.is_set():
+                await _run_in_daemon_thread(self.run_once)
+                self._cycles_done += 1
+                self._last_cycle_at = time.time()
+                if stop.is_set():
+                    break
+                
+                # Ждем до следующей проверки (или сигнала остановки)
+                wait_seconds = self.config['check_interval_minutes'] * 60
+                logging.info(f"Ожидание {self.config['check_interval_minutes']} минут до следующей проверки...")
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=wait_seconds)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if status_runner is not None:
+                await status_runner.cleanup()
+    
+    async def _start_status_server(self):
+        """
+        Запустить HTTP /metrics (формат Prometheus) на том же цикле событий
+        
+        Returns:
+            aiohttp AppRunner или None, если status_port не задан
+        """
+        port = int(self.config.get('status_port', 0))
+        if not port:
+            return None
+        if not AIOHTTP_AVAILABLE:
+            logging.warning("aiohttp не установлен (pip install aiohttp), /metrics недоступен")
+            return None
+        
+        from aiohttp import web
+        
+        async def metrics(request):
+            lines = [
+                f"soundcloud_bot_cycles_total {self._cycles_done}",
+                f"soundcloud_bot_last_cycle_timestamp_seconds {self._last_cycle_at:.0f}",
+                f"soundcloud_bot_processed_tracks {len(self.processed_tracks)}",
+            ]
+            return web.Response(text='\n'.join(lines) + '\n')
+        
+        app = web.Application()
+        app.router.add_get('/metrics', metrics)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, '127.0.0.1', port).start()
+        logging.info(f"Метрики доступны на http://127.0.0.1:{port}/metrics")
+        return runner
+    
     def run(self):
         """Основной цикл работы бота"""
         logging.info("Бот запущен")
@@ -971,14 +2299,10 @@ class SoundCloudAutoLiker:
         logging.info(f"Режим dry_run: {self.config['dry_run']}")
         
         try:
-            while True:
-                self.run_once()
-                
-                # Ждем до следующей проверки
-                wait_seconds = self.config['check_interval_minutes'] * 60
-                logging.info(f"Ожидание {self.config['check_interval_minutes']} минут до следующей проверки...")
-                time.sleep(wait_seconds)
-                
+            asyncio.run(self.run_async())
+            logging.info("Бот остановлен")
+            self.close_selenium()
+            
         except KeyboardInterrupt:
             logging.info("\nБот остановлен пользователем")
             self.close_selenium()
@@ -988,8 +2312,78 @@ class SoundCloudAutoLiker:
             raise
 
 
+def _run_in_daemon_thread(func) -> asyncio.Future:
+    """
+    Выполнить func в daemon-потоке и дождаться результата из asyncio
+    
+    В отличие от asyncio.to_thread, прерванный asyncio.run не ждёт
+    завершения такого потока, поэтому KeyboardInterrupt срабатывает сразу.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    
+    def set_result(result, error):
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    
+    def target():
+        try:
+            result, error = func(), None
+        except Exception as e:
+            result, error = None, e
+        try:
+            loop.call_soon_threadsafe(set_result, result, error)
+        except RuntimeError:
+            pass  # asyncio.run уже прерван, цикл событий закрыт
+    
+    threading.Thread(target=target, daemon=True).start()
+    return future
+
+
+def _build_arg_parser() -> argparse.ArgumentParser:
+    """Аргументы командной строки (без аргументов запускается интерактивное меню)"""
+    parser = argparse.ArgumentParser(description='SoundCloud Auto-Liker Bot')
+    parser.add_argument('--config', default='config.json', help='путь к файлу конфигурации')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    sub.add_parser('once', help='разовый запуск (один раз)')
+    sub.add_parser('loop', help='постоянная работа (цикл)')
+    sub.add_parser('show-followings', help='тест: показать подписки')
+    reposts_parser = sub.add_parser('show-reposts', help='тест: показать репосты пользователя')
+    reposts_parser.add_argument('username', help='username пользователя SoundCloud')
+    sub.add_parser('test-login', help='тест: проверка входа через Selenium')
+    return parser
+
+
+def run_command(args: argparse.Namespace):
+    """Выполнить команду из командной строки без вопросов в stdin"""
+    bot = SoundCloudAutoLiker(args.config)
+    
+    if args.cmd == 'once':
+        bot.run_once()
+        bot.close_selenium()
+    elif args.cmd == 'loop':
+        bot.run()
+    elif args.cmd == 'show-followings':
+        bot.test_show_followings()
+    elif args.cmd == 'show-reposts':
+        bot.test_show_user_reposts(args.username)
+    elif args.cmd == 'test-login':
+        success = bot.selenium_login()
+        bot.close_selenium()
+        if not success:
+            sys.exit(1)
+
+
 def main():
     """Точка входа"""
+    if sys.argv[1:]:
+        run_command(_build_arg_parser().parse_args())
+        return
+    
     print("=" * 60)
     print("SoundCloud Auto-Liker Bot")
     print("=" * 60)